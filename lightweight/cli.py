@@ -26,7 +26,7 @@ from shutil import rmtree
 from typing import Callable, Any
 
 from .errors import InvalidCommand, InvalidSiteCliUsage
-from .lw import start_server, FailedGeneration, set_log_level, add_log_arguments
+from .lw import start_server, FailedGeneration, set_log_level, add_log_arguments, positional_args_count
 from .site import Site
 
 logger = getLogger('lw')
@@ -158,12 +158,3 @@ class SiteCli:
         except FailedGeneration as e:
             pass
 
-
-def positional_args_count(func: Callable, *, equals: int) -> bool:
-    """
-    if not positional_args_count(func, equals=2):
-        ...
-    """
-    count = equals
-    params = inspect.signature(func).parameters
-    return len(params) >= count and all(p.default != p.empty for p in list(params.values())[count:])
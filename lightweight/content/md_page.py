@@ -88,9 +88,8 @@ class MarkdownPage(Content):
 
     @staticmethod
     def _extract_preview(html):
-        preview_split = html.split('<!--preview-->', maxsplit=1)
-        preview_html = preview_split[0] if len(preview_split) == 2 else None
-        return preview_html
+        preview_html, separator, _ = html.partition('<!--preview-->')
+        return preview_html if separator else None
 
     def _evaluated_props(self, ctx) -> Dict[str, Any]:
         return {key: _eval_if_lazy(value, ctx) for key, value in self.props.items()}
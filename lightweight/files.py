@@ -1,9 +1,11 @@
 """Lightweight utilities for working with files."""
 import os
+import re
+import time
 from contextlib import contextmanager
-from glob import glob
+from fnmatch import translate
 from pathlib import Path
-from typing import Union, List
+from typing import Union, List, Iterator, Tuple, Dict, Pattern, Sequence
 
 
 def paths(pattern: Union[str, Path]) -> List[Path]:
@@ -19,9 +21,118 @@ def paths(pattern: Union[str, Path]) -> List[Path]:
 
     [1]: https://en.wikipedia.org/wiki/Glob_(programming)
     """
+    return list(ipaths(pattern))
+
+
+def ipaths(pattern: Union[str, Path]) -> Iterator[Path]:
+    """Iterate over paths matching the provided glob pattern, without collecting them all at once.
+
+    Same as [paths], only lazy.
+    """
     if isinstance(pattern, Path):
-        return [pattern]
-    return [Path(p) for p in glob(pattern, recursive=True)]
+        yield pattern
+        return
+    for p in _glob(pattern):
+        yield Path(p)
+
+
+_MAGIC = re.compile('[*?[]')
+_RECURSIVE = '**'
+
+Segment = Union[str, Pattern[str]]  # a literal name, a compiled wildcard or `**`
+Listing = Tuple[Tuple[str, bool], ...]  # (name, is directory) of every directory entry
+
+_listings: Dict[str, Tuple[int, Listing]] = {}  # absolute directory path -> (mtime in ns, listing)
+_RACY_NS = 2_000_000_000  # listings of directories modified more recently are not cached
+
+
+def _glob(pattern: str) -> Iterator[str]:
+    """Match the pattern the same way as a recursive `glob.iglob`,
+    only scanning directories which can contain the matching paths.
+    """
+    if os.altsep:
+        pattern = pattern.replace(os.altsep, os.sep)
+    parts = pattern.split(os.sep)
+    first_magic = next((i for i, part in enumerate(parts) if _MAGIC.search(part)), None)
+    if first_magic is None:
+        if os.path.lexists(pattern):
+            yield pattern
+        return
+    root = os.sep.join(parts[:first_magic])
+    if first_magic and not root:
+        root = os.sep
+    segments = [_compile(part) for part in parts[first_magic:]]
+    yield from _match(root, os.path.abspath(root or os.curdir), segments)
+
+
+def _compile(part: str) -> Segment:
+    if part == _RECURSIVE or not _MAGIC.search(part):
+        return part
+    hidden = '' if part.startswith('.') else r'(?!\.)'  # wildcards match hidden files only explicitly
+    return re.compile(hidden + translate(part))
+
+
+def _match(location: str, absolute: str, segments: Sequence[Segment]) -> Iterator[str]:
+    segment, rest = segments[0], segments[1:]
+    if segment == _RECURSIVE:
+        if not rest:
+            if location:
+                yield os.path.join(location, '')
+            yield from _descendants(location, absolute)
+            return
+        yield from _match(location, absolute, rest)
+        for name, is_dir in _listing(absolute):
+            if is_dir and not name.startswith('.'):
+                yield from _match(os.path.join(location, name), os.path.join(absolute, name), segments)
+    elif isinstance(segment, str):
+        if rest:
+            if os.path.isdir(os.path.join(absolute, segment)):
+                yield from _match(os.path.join(location, segment), os.path.join(absolute, segment), rest)
+        elif (segment or location) and os.path.lexists(os.path.join(absolute, segment)):
+            yield os.path.join(location, segment)  # a trailing '' matches the directory itself, but not the root
+    else:
+        for name, is_dir in _listing(absolute):
+            if not segment.match(name):
+                continue
+            if not rest:
+                yield os.path.join(location, name)
+            elif is_dir:
+                yield from _match(os.path.join(location, name), os.path.join(absolute, name), rest)
+
+
+def _descendants(location: str, absolute: str) -> Iterator[str]:
+    for name, is_dir in _listing(absolute):
+        if name.startswith('.'):
+            continue
+        yield os.path.join(location, name)
+        if is_dir:
+            yield from _descendants(os.path.join(location, name), os.path.join(absolute, name))
+
+
+def _listing(absolute: str) -> Listing:
+    """List the directory, reusing the previous listing if the directory was not modified since."""
+    try:
+        mtime = os.stat(absolute).st_mtime_ns
+    except OSError:
+        return ()
+    cached = _listings.get(absolute)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with os.scandir(absolute) as entries:
+            listing = tuple((entry.name, _is_dir(entry)) for entry in entries)
+    except OSError:
+        return ()
+    if time.time_ns() - mtime > _RACY_NS:  # modification time is too coarse to trust for recent changes
+        _listings[absolute] = (mtime, listing)
+    return listing
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
 
 
 @contextmanager
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, replace
 from pathlib import Path, PurePath
 from typing import Callable, Tuple, Union, IO, Any
 
 UrlFactory = Callable[[str], str]  # A url factory a full URL with a provided relative location.
 
+_CREATE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
 
 @dataclass(frozen=True)
 class GenPath:
@@ -156,8 +159,13 @@ class GenPath:
         return replace(self, relative_path=self.relative_path.with_suffix(suffix))
 
     def create(self, contents: Union[str, bytes]) -> None:
-        """Create a file with provided contents. Contents can be `str` or `bytes`."""
+        """Create a file with provided contents. Contents can be `str` (written as UTF-8) or `bytes`."""
         self.parent.mkdir()
-        binary_mode = isinstance(contents, bytes)
-        with self.open('wb' if binary_mode else 'w') as f:
-            f.write(contents)  # type: ignore
+        data = contents.encode('utf-8') if isinstance(contents, str) else contents
+        fd = os.open(self.real_path, _CREATE_FLAGS, 0o666)
+        try:
+            remaining = memoryview(data)
+            while remaining:
+                remaining = remaining[os.write(fd, remaining):]
+        finally:
+            os.close(fd)
@@ -20,7 +20,8 @@ class GenTask:
     and is passed directly to [`content.write(path, ctx)`][Content.write].
 
     Includes `cwd` (current working directory) in which the original content was created.
-    Content [`write(...)`][Content.write] operates from this directory.
+    Content [`write(...)`][Content.write] operates from this directory,
+    except for copies, which have their source resolved against it and are written from any directory.
     """
     path: GenPath
     ctx: GenContext
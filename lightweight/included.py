@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from os.path import join
 from pathlib import Path
 from typing import List, Dict
 
 from lightweight import Content, GenContext
+from lightweight.content.copies import _COPIES
 from lightweight.generation import GenTask
 
 
@@ -51,4 +53,10 @@ class IncludedContent:
         return Path(self.location)
 
     def make_tasks(self, ctx: GenContext) -> List[GenTask]:
-        return [GenTask(ctx.path(self.location), ctx, self.content, self.cwd)]
+        return [GenTask(ctx.path(self.location), ctx, self._resolved_content(), self.cwd)]
+
+    def _resolved_content(self) -> Content:
+        """Copies are resolved against the `cwd`, so that they can be written from any working directory."""
+        if isinstance(self.content, _COPIES):
+            return replace(self.content, source=Path(join(self.cwd, self.content.source)))
+        return self.content
@@ -30,68 +30,42 @@ lw serve --help
 ```
 """
 import asyncio
+import atexit
 import inspect
 import multiprocessing as mp
 import os
 import re
+import signal
 import stat
 import sys
+import sysconfig
+import time
 import traceback
 from argparse import ArgumentParser
 from asyncio import gather
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import partial
 from importlib.machinery import SourceFileLoader
 from importlib.util import module_from_spec, spec_from_loader
 from logging import getLogger, DEBUG, INFO, ERROR, WARNING
 from pathlib import Path
 from random import randint, sample
-from typing import Any, Optional, Callable
+from types import ModuleType
+from weakref import WeakKeyDictionary
+from typing import Any, Optional, Callable, Set, Dict, Tuple, List
 
 from slugify import slugify  # type: ignore
 
-from lightweight import Site, jinja, directory, jinja_env, paths
+from lightweight import Site, Content, jinja, directory, jinja_env
+from lightweight.content import copy
 from lightweight.errors import InvalidCommand
+from lightweight.files import _RACY_NS
 from lightweight.server import DevServer, LiveReloadServer
 
 logger = getLogger('lw')
 
 
-class Process(mp.Process):
-    """https://stackoverflow.com/a/33599967/8677389"""
-
-    def __init__(self, *args, **kwargs):
-        mp.Process.__init__(self, *args, **kwargs)
-        self._pconn, self._cconn = mp.Pipe()
-        self._exception = None
-        self._traceback = None
-
-    def run(self):
-        try:
-            mp.Process.run(self)
-            self._cconn.send(None)
-        except Exception as e:
-            tb = traceback.format_exc()
-            self._cconn.send((e, tb))
-            # raise e  # You can still rise this exception if you need to
-
-    @property
-    def exception(self):
-        self._recv_exc()
-        return self._exception
-
-    def _recv_exc(self):
-        if self._pconn.poll():
-            recv = self._pconn.recv()
-            if recv is not None:
-                self._exception, self._traceback = recv
-
-    @property
-    def traceback(self):
-        self._recv_exc()
-        return self._traceback
-
-
 class FailedGeneration(Exception):
     pass
 
@@ -106,6 +80,7 @@ class Generator:
         self.host = host
         self.port = port
         self._loaded = False
+        self._worker = None  # type: Optional[GenerationWorker]
 
     @property
     def url(self) -> str:
@@ -120,16 +95,31 @@ class Generator:
                                  f'with a "site.generate(out)" method.')
         site.generate(self.out)
 
-    def generate(self):
-        p = Process(target=self)
-        p.start()
-        p.join()
-        if p.exception:
-            if isinstance(p.exception, InvalidCommand):
-                raise p.exception
-            else:
-                logger.error(p.traceback)
-                raise FailedGeneration() from p.exception
+    def generate(self, in_process: bool = True):
+        """Generate the site.
+
+        By default the generation is executed in the current process.
+        Otherwise, it is delegated to a long-lived worker process,
+        which keeps the server process isolated from the user code between live reloads.
+        """
+        if in_process:
+            try:
+                self()
+            except InvalidCommand:
+                raise
+            except Exception as e:
+                logger.error(traceback.format_exc())
+                raise FailedGeneration() from e
+        else:
+            if self._worker is None:
+                self._worker = GenerationWorker(self)
+            self._worker.generate()
+
+    def close(self):
+        """Stop the generation worker process, if one was started."""
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
 
     def load_executable(self):
         module = load_module(self.func_file)
@@ -146,18 +136,143 @@ class Generator:
         return func
 
 
+class GenerationWorker:
+    """A long-lived process executing the generator upon request.
+
+    Requests and results are exchanged over a [Pipe][mp.Pipe]:
+    a `('generate',)` request is answered with `None` on success or with `(error, traceback)` on failure.
+    The error is an [InvalidCommand] or a string describing any other exception.
+    """
+
+    def __init__(self, generator: Generator):
+        self._generator = generator
+        self._start()
+        atexit.register(self.stop)
+
+    def _start(self):
+        self._conn, child_conn = mp.Pipe()
+        self._process = mp.Process(target=_run_worker, args=(self._generator, child_conn))
+        self._process.start()
+        child_conn.close()
+
+    def generate(self):
+        try:
+            self._conn.send(('generate',))
+            recv = self._conn.recv()
+        except (EOFError, OSError) as e:  # the worker exited, e.g. the generator called `sys.exit()` or crashed
+            self._process.join()
+            exitcode = self._process.exitcode
+            self._conn.close()
+            self._start()
+            raise FailedGeneration(f'Generation process exited unexpectedly with code {exitcode}.') from e
+        if recv is not None:
+            error, tb = recv
+            if isinstance(error, InvalidCommand):
+                raise error
+            else:
+                logger.error(tb)
+                raise FailedGeneration(error)
+
+    def stop(self):
+        atexit.unregister(self.stop)
+        try:
+            self._conn.send(('stop',))
+        except OSError:
+            pass  # already exited
+        self._process.join()
+        self._conn.close()
+
+
+def _run_worker(generator: Generator, conn):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # ^C reaches the whole process group; the server stops the worker
+    preloaded = set(sys.modules)
+    libraries = _library_locations()
+    while True:
+        request = conn.recv()
+        if request[0] == 'stop':
+            break
+        try:
+            generator()
+            conn.send(None)
+        except Exception as e:
+            # User exceptions may not be picklable, so only their description is sent.
+            error = InvalidCommand(str(e)) if isinstance(e, InvalidCommand) else f'{type(e).__name__}: {e}'
+            conn.send((error, traceback.format_exc()))
+        finally:
+            if _unload_modules(within=generator.source, keep=preloaded, libraries=libraries):
+                _MODULE_CACHE.clear()  # cached modules may reference the unloaded ones
+    conn.close()
+
+
+def _library_locations() -> Tuple[str, ...]:
+    """Directories of installed packages and the standard library, e.g. a virtual environment inside the project."""
+    paths = sysconfig.get_paths()
+    locations = {paths[name] for name in ('stdlib', 'platstdlib', 'purelib', 'platlib') if name in paths}
+    locations.update((sys.prefix, sys.exec_prefix, sys.base_prefix))
+    return tuple(os.path.join(location, '') for location in locations)
+
+
+def _unload_modules(*, within: Path, keep: Set[str], libraries: Tuple[str, ...]) -> bool:
+    """Remove modules imported from the project sources, so that their changes are picked up on next generation.
+    Modules of installed libraries are kept, even if they are located inside the project.
+
+    Returns `True` if any of the modules were removed."""
+    location = os.path.join(str(within), '')
+    unloaded = False
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, '__file__', None)
+        if name in keep or file is None or not file.startswith(location) or file.startswith(libraries):
+            continue
+        del sys.modules[name]
+        unloaded = True
+    return unloaded
+
+
 def positional_args_count(func: Callable, *, equals: int) -> bool:
     """
     if not positional_args_count(func, equals=2):
         ...
     """
     count = equals
-    params = inspect.signature(func).parameters
-    return len(params) >= count and all(p.default != p.empty for p in list(params.values())[count:])
+    if inspect.ismethod(func):  # cache the function itself, not the bound method referencing its instance
+        func, count = func.__func__, count + 1
+    params_count, defaults = _signature(func)
+    return params_count >= count and all(defaults[count:])
+
+
+_SIGNATURES: WeakKeyDictionary = WeakKeyDictionary()  # func -> signature, not keeping the reloaded functions alive
+
+
+def _signature(func: Callable) -> Tuple[int, Tuple[bool, ...]]:
+    """The number of parameters and whether each of them has a default value."""
+    try:
+        cached = _SIGNATURES.get(func)
+    except TypeError:  # cannot be weakly referenced, e.g. a builtin
+        return _inspect_signature(func)
+    if cached is None:
+        cached = _SIGNATURES[func] = _inspect_signature(func)
+    return cached
+
+
+def _inspect_signature(func: Callable) -> Tuple[int, Tuple[bool, ...]]:
+    params = inspect.signature(func).parameters.values()
+    return len(params), tuple(p.default is not p.empty for p in params)
+
+
+_MODULE_CACHE: Dict[Path, Tuple[Tuple[int, int], ModuleType]] = {}  # path -> ((mtime in ns, size), module)
 
 
 def load_module(p: Path) -> Any:
-    module_name = p.name.rsplit('.')[0]
+    """Load a module from the file at path.
+
+    Modules are cached until the modification time or the size of their file changes.
+    Files modified too recently to trust their modification time are loaded anew every time."""
+    file_stat = p.stat()
+    version = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _MODULE_CACHE.get(p)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    module_name = p.name.partition('.')[0]
     with sys_path_starting(with_=p.parent):
         loader = SourceFileLoader(module_name, str(p))
         spec = spec_from_loader(module_name, loader, is_package=False)
@@ -165,15 +280,28 @@ def load_module(p: Path) -> Any:
             raise RuntimeError("Failed to load module")
         module = module_from_spec(spec)
         loader.exec_module(module)
+    if time.time_ns() - file_stat.st_mtime_ns > _RACY_NS:  # modification time is too coarse for recent changes
+        _MODULE_CACHE[p] = (version, module)
+    else:
+        _MODULE_CACHE.pop(p, None)
     return module
 
 
 @contextmanager
 def sys_path_starting(with_: Path):
+    """Make modules from the directory importable, unless they already are."""
     location = str(with_)
+    if location in sys.path:
+        yield
+        return
     sys.path.insert(0, location)
-    yield
-    sys.path.remove(location)
+    try:
+        yield
+    finally:
+        try:
+            sys.path.remove(location)
+        except ValueError:
+            pass
 
 
 def start_server(func_file: Path, func_name: str,
@@ -182,30 +310,34 @@ def start_server(func_file: Path, func_name: str,
     out = absolute_out(out, source)
 
     generator = Generator(func_file, func_name, source=source, host=host, port=port, out=out)
-    generator.generate()
+    try:
+        generator.generate(in_process=not enable_reload)
 
-    if not enable_reload:
-        server = DevServer(out)
-    else:
-        server = LiveReloadServer(out, watch=source, regenerate=generator.generate, ignored=[out])
+        if not enable_reload:
+            server = DevServer(out)
+        else:
+            server = LiveReloadServer(out, watch=source, regenerate=partial(generator.generate, in_process=False),
+                                      ignored=[out])
 
-    logger.info(f'Runner: {func_name} in {func_file}')
-    logger.info(f'Sources: {source}')
-    logger.info(f'Out: {out}')
-    logger.info(f'Starting server at: "http://{host}:{port}"')
+        logger.info(f'Runner: {func_name} in {func_file}')
+        logger.info(f'Sources: {source}')
+        logger.info(f'Out: {out}')
+        logger.info(f'Starting server at: "http://{host}:{port}"')
 
-    loop = loop or asyncio.new_event_loop()
-    server.serve(host=host, port=port, loop=loop)
-    try:
-        loop.run_forever()
-    except (KeyboardInterrupt, SystemExit):
-        print()  # new line after ^C
-        logger.info('Stopping the server.')
-        server.shutdown(loop)
-        pending = asyncio.all_tasks(loop=loop)
-        loop.run_until_complete(gather(*pending))
-        loop.stop()
-        logger.info('Server stopped.')
+        loop = loop or asyncio.new_event_loop()
+        server.serve(host=host, port=port, loop=loop)
+        try:
+            loop.run_forever()
+        except (KeyboardInterrupt, SystemExit):
+            print()  # new line after ^C
+            logger.info('Stopping the server.')
+            server.shutdown(loop)
+            pending = asyncio.all_tasks(loop=loop)
+            loop.run_until_complete(gather(*pending))
+            loop.stop()
+            logger.info('Server stopped.')
+    finally:
+        generator.close()
 
 
 def absolute_out(out: Optional[Path], abs_source: Path) -> Path:
@@ -214,12 +346,16 @@ def absolute_out(out: Optional[Path], abs_source: Path) -> Path:
     return out.absolute()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Color(object):
     """A color from red, green and blue."""
     r: int
     g: int
     b: int
+    _rgb: str = field(init=False, repr=False, compare=False)  # "r, g, b" used by every CSS representation
+
+    def __post_init__(self):
+        object.__setattr__(self, '_rgb', f'{self.r}, {self.g}, {self.b}')
 
     @classmethod
     def bright(cls):
@@ -231,8 +367,8 @@ class Color(object):
     def css(self, alpha=None) -> str:
         "A string representation of color which can be used in CSS."
         if alpha is not None:
-            return f'rgba({self.r}, {self.g}, {self.b}, {alpha})'
-        return f'rgb({self.r}, {self.g}, {self.b})'
+            return f'rgba({self._rgb}, {alpha})'
+        return f'rgb({self._rgb})'
 
 
 def quickstart(location: str, title: Optional[str]):
@@ -246,18 +382,10 @@ def quickstart(location: str, title: Optional[str]):
 
     template_location = Path(__file__).parent / 'project-template'
 
-    with directory(template_location), custom_jinja_tags():
+    with directory(template_location), _CustomJinjaTags():
         site = Site(url="https://example.com/", title=title)
 
-        [site.add(str(p), jinja(p)) for p in paths('_templates_/**/*.html')]
-        [site.add(str(p), jinja(p)) for p in paths('*.html')]
-        site.add('website.py', jinja('website.py.j2', title_slug=title_slug))
-        site.add('requirements.txt', jinja('requirements.txt.j2', version=lw_version()))
-        site.add('posts')
-        [site.add(str(p), jinja(p)) for p in paths('styles/**/*css') if p.name != 'attributes.scss']
-        site.add('styles/attributes.scss', jinja('styles/attributes.scss', accent=Color.bright()))
-        site.add('js')
-        site.add('img')
+        site._bulk_include(project_template_content(title_slug))
 
         site.generate(abs_out)
 
@@ -267,30 +395,76 @@ def quickstart(location: str, title: Optional[str]):
     logger.info(f' Project initialized in: {abs_out}')
 
 
-@contextmanager
-def custom_jinja_tags():
-    original_tags = (jinja_env.block_start_string, jinja_env.block_end_string,
-                     jinja_env.variable_start_string, jinja_env.variable_end_string,
-                     jinja_env.comment_start_string, jinja_env.comment_end_string)
-    jinja_env.filters['human_era'] = lambda year: 10000 + year  # https://www.youtube.com/watch?v=czgOWmtGVGs
-    jinja_env.block_start_string = '{?'
-    jinja_env.block_end_string = '?}'
-    jinja_env.variable_start_string = '{!'
-    jinja_env.variable_end_string = '!}'
-    jinja_env.comment_start_string = '{//'
-    jinja_env.comment_end_string = '//}'
+_TEMPLATED_DIRECTORIES = ('_templates_', 'styles')
 
-    yield
 
-    (jinja_env.block_start_string, jinja_env.block_end_string,
-     jinja_env.variable_start_string, jinja_env.variable_end_string,
-     jinja_env.comment_start_string, jinja_env.comment_end_string) = original_tags
+def project_template_content(title_slug: str) -> List[Tuple[str, Content]]:
+    """Collect the project template content from cwd in a single walk.
+
+    Top-level HTML, HTML in `_templates_` and CSS/SCSS in `styles` are rendered as Jinja templates,
+    as well as top-level `*.j2` files (stripping the suffix).
+    Top-level directories other than `_templates_` and `styles` are copied as a whole.
+    Other files, and anything hidden (e.g. `.DS_Store`), are not included.
+    """
+    props = {
+        'website.py.j2': dict(title_slug=title_slug),
+        'requirements.txt.j2': dict(version=lw_version()),
+        os.path.join('styles', 'attributes.scss'): dict(accent=Color.bright()),
+    }
+    content = []  # type: List[Tuple[str, Content]]
+    for directory_path, directory_names, file_names in os.walk(os.curdir):
+        relative_directory = os.path.relpath(directory_path)
+        top_directory = relative_directory.split(os.sep)[0]
+        if relative_directory == os.curdir:
+            relative_directory = top_directory = ''
+            content.extend((name, copy(name)) for name in directory_names
+                           if name not in _TEMPLATED_DIRECTORIES and not name.startswith('.'))
+            directory_names[:] = [name for name in directory_names if name in _TEMPLATED_DIRECTORIES]
+        else:
+            directory_names[:] = [name for name in directory_names if not name.startswith('.')]
+        for name in file_names:
+            if name.startswith('.'):
+                continue
+            location = os.path.join(relative_directory, name)
+            if not top_directory and name.endswith('.j2'):
+                content.append((location[:-len('.j2')], jinja(location, **props.get(location, {}))))
+            elif ((name.endswith('.html') and top_directory in ('', '_templates_'))
+                  or (top_directory == 'styles' and name.endswith('css'))):
+                content.append((location, jinja(location, **props.get(location, {}))))
+    return content
+
+
+class _CustomJinjaTags:
+    """Swap Jinja tags of the project template (e.g. `{! variable !}`), restoring the original tags on exit."""
+    __slots__ = ('_original_tags',)
+
+    def __enter__(self):
+        e = jinja_env
+        self._original_tags = (e.block_start_string, e.block_end_string,
+                               e.variable_start_string, e.variable_end_string,
+                               e.comment_start_string, e.comment_end_string)
+        e.filters['human_era'] = lambda year: 10000 + year  # https://www.youtube.com/watch?v=czgOWmtGVGs
+        e.block_start_string = '{?'
+        e.block_end_string = '?}'
+        e.variable_start_string = '{!'
+        e.variable_end_string = '!}'
+        e.comment_start_string = '{//'
+        e.comment_end_string = '//}'
+
+    def __exit__(self, *exc_info):
+        e = jinja_env
+        (e.block_start_string, e.block_end_string,
+         e.variable_start_string, e.variable_end_string,
+         e.comment_start_string, e.comment_end_string) = self._original_tags
+
+
+_TITLE_SLUG = re.compile('[a-z][a-z0-9_]+$')  # in code nothing can start with digits
 
 
 def slugify_title(title):
     title_slug = slugify(title, separator='_')
-    title_slug = re.findall('[a-z][a-z0-9_]+$', title_slug)[0]  # in code nothing can start with digits
-    title_slug.replace('\'', '’')
+    title_slug = _TITLE_SLUG.search(title_slug).group(0)
+    title_slug = title_slug.replace('\'', '’')
     return title_slug
 
 
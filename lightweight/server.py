@@ -190,10 +190,7 @@ class DevServer:
         else:
             logger.debug(f'{now_repr()}: {method} {path} Requested')
         try:
-            if '?' in path:
-                path, qs = path.split('?', 1)
-            else:
-                qs = ''
+            path, _, qs = path.partition('?')
             headers = await self._parse_headers(reader)
             request = HttpRequest(
                 method=method,
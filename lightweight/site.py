@@ -3,21 +3,24 @@ from __future__ import annotations
 __all__ = ['Site']
 
 import asyncio
+import os
+import threading
 from asyncio import gather
 from collections import defaultdict
 from concurrent.futures.thread import ThreadPoolExecutor
+from itertools import chain
 from logging import getLogger
-from os import getcwd
+from os import getcwd, cpu_count
 from os.path import abspath
 from pathlib import Path
 from shutil import rmtree
-from typing import overload, Union, Optional, List, Dict
-from urllib.parse import urlparse, urljoin
+from typing import overload, Union, Optional, List, Dict, Tuple, Iterable
+from urllib.parse import urlsplit, SplitResult
 
 from .content.content_abc import Content
-from .content.copies import copy
+from .content.copies import copy, DirectoryCopy, _COPIES
 from .errors import AbsolutePathIncluded, IncludedDuplicate
-from .files import paths, directory
+from .files import ipaths, directory
 from .generation import GenContext, GenTask
 from .included import Includes, IncludedContent
 
@@ -50,6 +53,8 @@ class Site:
     ```
     """
     url: str
+    host: str  # network location of the URL, e.g. "example.org:8080"
+    path_prefix: str  # path of the URL, always ending with a slash, e.g. "/blog/"
     content: Includes
     title: Optional[str]
 
@@ -60,7 +65,10 @@ class Site:
             title: Optional[str] = None,
             content: Optional[Includes] = None,
     ):
-        self.url = _check_site_url(url)
+        url_parts = _check_site_url(url)
+        self.url = url
+        self.host = url_parts.netloc
+        self.path_prefix = url_parts.path
         self.title = title
         self.content = Includes() if not content else content
 
@@ -92,20 +100,31 @@ class Site:
         if location.startswith('/'):
             raise AbsolutePathIncluded()
         if content is None:
-            contents = {str(path): copy(path) for path in paths(location)}
-            if not len(contents):
+            found = ipaths(location)
+            first = next(found, None)
+            if first is None:
                 raise FileNotFoundError(f'There were no files at paths: {location}')
-            [self._include_content(path, content_, cwd) for path, content_ in contents.items()]
+            self._include_content(str(first), copy(first), cwd)
+            for path in found:
+                self._include_content(str(path), copy(path), cwd)
         elif isinstance(content, Content):
             self._include_content(location, content, cwd)
         elif isinstance(content, str):
-            source = Path(content)
-            if not source.exists():
+            if not os.path.exists(content):
                 raise FileNotFoundError(f'File does not exist: {content}')
-            self._include_content(location, copy(source), cwd)
+            self._include_content(location, copy(Path(content)), cwd)
         else:
             raise ValueError('Content, str, or None types are accepted as add parameter')
 
+    def _bulk_include(self, contents: Iterable[Tuple[str, Content]]):
+        """Include multiple `(location, content)` pairs, recording the `cwd` once for all of them."""
+        cwd = getcwd()
+        for location, content in contents:
+            self.info(f'Adding "{location}"')
+            if location.startswith('/'):
+                raise AbsolutePathIncluded()
+            self._include_content(location, content, cwd)
+
     def _include_content(self, location: str, content: Content, cwd: str):
         self._include(
             IncludedContent(
@@ -125,41 +144,49 @@ class Site:
 
         If the out directory does not exist — it will be created along with its whole hierarchy.
 
-        If the out directory already exists – it will be deleted with all of it contents.
+        If the out directory already exists – it is updated in place:
+        anything the site no longer generates is deleted before writing, and unchanged copies are not rewritten.
         """
         self.info(f"STARTED GENERATION")
         out = Path(abspath(out))
         self.info(f"OUT: {out}")
-        if out.exists():
-            self.info(f"Deleting existing OUT")
-            rmtree(out)
         out.mkdir(parents=True, exist_ok=True)
         self._generate(out)
         self.info(f"COMPLETED GENERATION")
 
     def _generate(self, out: Path):
         ctx = self.create_ctx(out)
-        tasks = defaultdict(list)  # type: Dict[str, List[GenTask]]
-        all_tasks = list()  # type: List[GenTask]
-        for ic in self.content:
-            _tasks = ic.make_tasks(ctx)
-            for task in _tasks:
-                tasks[task.cwd].append(task)
-            all_tasks.extend(_tasks)
+        all_tasks = list(chain.from_iterable(ic.make_tasks(ctx) for ic in self.content))
         ctx.tasks = tuple(all_tasks)  # injecting tasks, for other content to have access to site structure
+        tasks = defaultdict(list)  # type: Dict[str, List[GenTask]]
+        for task in all_tasks:
+            tasks[task.cwd].append(task)
+        _remove_stale(out, all_tasks)
 
-        loop = asyncio.new_event_loop()
+        loop = _generation_loop()
         asyncio.set_event_loop(loop)
-        executor = ThreadPoolExecutor()
-
-        async def scheduled(task):
-            return await loop.run_in_executor(executor, task.execute)
-
-        for cwd, _tasks in tasks.items():
-            with directory(cwd):
-                writes = map(scheduled, _tasks)
-                loop.run_until_complete(gather(*writes))
-        loop.close()
+        executor = _generation_executor()
+
+        def schedule(task: GenTask):
+            return loop.run_in_executor(executor, task.execute)
+
+        async def write_all():
+            # Copies have their sources resolved against cwd, so they are written without changing directory.
+            # Other content (e.g. Jinja templates) is resolved from cwd, and has to be written from it.
+            independent = [schedule(task) for task in all_tasks if isinstance(task.content, _COPIES)]
+            for cwd, _tasks in tasks.items():
+                dependent = [task for task in _tasks if not isinstance(task.content, _COPIES)]
+                if dependent:
+                    with directory(cwd):
+                        await gather(*map(schedule, dependent))
+            await gather(*independent)
+
+        try:
+            loop.run_until_complete(write_all())
+        finally:
+            if loop is not _main_loop:
+                asyncio.set_event_loop(None)
+                loop.close()
 
     def create_ctx(self, out: Path) -> GenContext:
         """Override for custom context types."""
@@ -173,6 +200,7 @@ class Site:
 
     def __truediv__(self, location: str) -> str:
         """Create a URL for the location at site.
+        The location is always relative to the site URL, even with a leading forward slash.
 
         ```python
         site = Site('https://example.org/')
@@ -182,7 +210,7 @@ class Site:
         ```
         """
         # TODO:mdrachuk:04.06.2020: replace with <SiteUrl> which can be added a / further and checks file existence
-        return urljoin(self.url, location)
+        return self.url + (location[1:] if location.startswith('/') else location)  # url always ends with a slash
 
     # ------------ LOGGER ------------
     def info(self, text):
@@ -192,10 +220,119 @@ class Site:
         logger.debug(f'{self.title or self.url} {text}')
 
 
-def _check_site_url(url: str) -> str:
-    url_parts = urlparse(url)
-    if url_parts.scheme == '':
+_executor = None  # type: Optional[ThreadPoolExecutor]
+_executor_lock = threading.Lock()
+_main_loop = None  # type: Optional[asyncio.AbstractEventLoop]
+_forked_loops = []  # type: List[asyncio.AbstractEventLoop]
+
+
+def _generation_executor() -> ThreadPoolExecutor:
+    """Thread pool writing the content, reused by every generation in the process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(32, (cpu_count() or 1) * 4), thread_name_prefix='lw-write')
+        return _executor
+
+
+def _generation_loop() -> asyncio.AbstractEventLoop:
+    """The loop of the main thread is reused between generations.
+    Other threads may generate concurrently, so each of their generations runs (and closes) its own loop.
+    """
+    global _main_loop
+    if threading.current_thread() is not threading.main_thread():
+        return asyncio.new_event_loop()
+    if _main_loop is None or _main_loop.is_closed():
+        _main_loop = asyncio.new_event_loop()
+    return _main_loop
+
+
+def _forget_after_fork():
+    """Threads and the event loop selector of the parent process are unusable in a forked child."""
+    global _executor, _executor_lock, _main_loop
+    _executor = None
+    _executor_lock = threading.Lock()
+    if _main_loop is not None:
+        # Closing the loop in the child (e.g. when collected) would unregister its self-pipe from the epoll selector,
+        # which is shared with the parent, leaving the parent loop unable to wake up. So it is never released.
+        _forked_loops.append(_main_loop)
+    _main_loop = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+def _remove_stale(out: Path, tasks: List[GenTask]):
+    """Delete whatever was left in out by the previous generation, which is not going to be written by the tasks.
+
+    Files at the targets of tasks are kept, as well as the files of directory copies still present in their source.
+    Directories at the targets of other content and files in place of directories required by the tasks are deleted,
+    so that the content can be written anew. Targets outside of out are left untouched.
+    """
+    targets = {}  # type: Dict[str, Optional[str]]  # target -> source of a directory copy
+    for task in tasks:
+        target = Path(os.path.normpath(task.path.real_path))
+        if out not in target.parents:
+            continue  # e.g. a location of "..", nothing outside of out is deleted
+        if isinstance(task.content, DirectoryCopy):
+            targets[str(target)] = str(task.content.source)
+            if target.is_file() or target.is_symlink():
+                target.unlink()
+        else:
+            targets[str(target)] = None
+            if target.is_dir() and not target.is_symlink():
+                rmtree(target)
+        for parent in target.parents:
+            if parent == out:
+                break
+            if parent.is_file() or parent.is_symlink():
+                parent.unlink()
+    _remove_untargeted(str(out), targets)
+
+
+def _remove_untargeted(directory_path: str, targets: Dict[str, Optional[str]]) -> bool:
+    """Delete entries of the directory which are neither targets nor contain any.
+
+    Returns `True` if the directory has no entries left."""
+    with os.scandir(directory_path) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.path in targets:
+            source = targets[entry.path]
+            if source is not None and entry.is_dir(follow_symlinks=False):
+                _remove_missing(entry.path, source, targets)
+        elif entry.is_dir(follow_symlinks=False):
+            if _remove_untargeted(entry.path, targets):
+                os.rmdir(entry.path)
+        else:
+            os.unlink(entry.path)
+    return not os.listdir(directory_path)
+
+
+def _remove_missing(target: str, source: str, targets: Dict[str, Optional[str]]):
+    """Delete entries of a directory copy which are no longer present in its source, unless they are targets."""
+    with os.scandir(target) as it:
+        entries = list(it)
+    for entry in entries:
+        source_path = os.path.join(source, entry.name)
+        if entry.path in targets:
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if os.path.isdir(source_path):
+                _remove_missing(entry.path, source_path, targets)
+            else:
+                rmtree(entry.path)
+        elif not os.path.isfile(source_path):
+            os.unlink(entry.path)
+
+
+def _check_site_url(url: str) -> SplitResult:
+    url_parts = urlsplit(url)
+    if not url_parts.scheme:
         raise ValueError('Missing scheme in Site URL.')
+    if not url_parts.netloc and url_parts.path.partition('/')[0].isdigit():  # "localhost:8080/" has scheme "localhost"
+        raise ValueError(f'Site URL ({url}) is a host with a port, but without a scheme, e.g. "http://{url}".')
     if not url.endswith('/'):
         raise ValueError(f'Site URL ({url}) must end with a forward slash (/).')
-    return url
+    return url_parts
@@ -1,17 +1,22 @@
 import asyncio
+import os
 import shlex
+import signal
 import subprocess
 import sys
 import time
+import weakref
 from os import getcwd
 from pathlib import Path
+from types import ModuleType
 
 import pytest
 from pytest import fixture
 
 from lightweight import directory, __version__, lw, Site, SiteCli, jinja
 from lightweight.errors import InvalidCommand
-from lightweight.lw import FailedGeneration, start_server
+from lightweight.lw import FailedGeneration, start_server, Generator, load_module, positional_args_count, \
+    slugify_title, Color, sys_path_starting, _unload_modules, project_template_content
 from tests.server_utils import get
 
 
@@ -243,6 +248,167 @@ class TestTheCli:
             start_server(Path(__file__), 'build_func', source=tmp_path, out=tmp_path / 'out', host='localhost',
                          port=8080, enable_reload=False, loop=loop)
 
+    @pytest.mark.parametrize('in_process', [True, False])
+    def test_generator(self, tmp_path: Path, in_process: bool):
+        with directory(tmp_path):
+            (tmp_path / 'index').write_text('{{ site }}')
+            generator = Generator(Path(__file__), 'build_jinja_file', source=tmp_path, out=tmp_path / 'out',
+                                  host='localhost', port=8080)
+            try:
+                generator.generate(in_process=in_process)
+                generator.generate(in_process=in_process)
+            finally:
+                generator.close()
+            assert (tmp_path / 'out' / 'index').read_text() == "http://localhost:8080/"
+
+    @pytest.mark.parametrize('in_process', [True, False])
+    def test_generator_failure(self, tmp_path: Path, in_process: bool):
+        generator = Generator(Path(__file__), 'build_jinja_file', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        try:
+            with directory(tmp_path), pytest.raises(FailedGeneration):
+                generator.generate(in_process=in_process)
+        finally:
+            generator.close()
+
+    def test_generator_unpicklable_failure(self, tmp_path: Path):
+        generator = Generator(Path(__file__), 'build_unpicklable_failure', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        try:
+            with pytest.raises(FailedGeneration, match='UnpicklableError: failed'):
+                generator.generate(in_process=False)
+        finally:
+            generator.close()
+
+    def test_generator_worker_respawned_after_exit(self, tmp_path: Path):
+        (tmp_path / 'index').write_text('{{ site }}')
+        exit_marker = tmp_path / 'exit'
+        exit_marker.touch()
+        generator = Generator(Path(__file__), 'build_exiting', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        try:
+            with directory(tmp_path):
+                with pytest.raises(FailedGeneration, match='exited unexpectedly with code 1'):
+                    generator.generate(in_process=False)
+                exit_marker.unlink()
+                generator.generate(in_process=False)
+        finally:
+            generator.close()
+        assert (tmp_path / 'out' / 'index').read_text() == "http://localhost:8080/"
+
+    def test_generator_worker_ignores_interrupt(self, tmp_path: Path):
+        (tmp_path / 'index').write_text('{{ site }}')
+        generator = Generator(Path(__file__), 'build_jinja_file', source=tmp_path, out=tmp_path / 'out',
+                              host='localhost', port=8080)
+        try:
+            with directory(tmp_path):
+                generator.generate(in_process=False)
+                process = generator._worker._process
+                os.kill(process.pid, signal.SIGINT)
+                time.sleep(0.1)
+                assert process.is_alive()
+                generator.generate(in_process=False)
+        finally:
+            generator.close()
+        assert process.exitcode == 0
+
+    def test_unload_modules_only_within_project(self, tmp_path: Path, monkeypatch):
+        project = tmp_path / 'project'
+        modules = {
+            'project_module': project / 'module.py',
+            'sibling_module': tmp_path / 'project-old' / 'module.py',
+            'venv_module': project / '.venv' / 'lib' / 'module.py',
+        }
+        for name, file in modules.items():
+            module = ModuleType(name)
+            module.__file__ = str(file)
+            monkeypatch.setitem(sys.modules, name, module)
+
+        assert _unload_modules(within=project, keep=set(), libraries=(str(project / '.venv') + os.sep,))
+        assert 'project_module' not in sys.modules
+        assert 'sibling_module' in sys.modules
+        assert 'venv_module' in sys.modules
+
+    def test_load_module_cached_until_modified(self, tmp_path: Path):
+        module_file = tmp_path / 'cached_module.py'
+        module_file.write_text('VALUE = 1')
+        os.utime(module_file, ns=(0, 1_000_000_000))
+        module = load_module(module_file)
+        assert load_module(module_file) is module
+
+        module_file.write_text('VALUE = 2')
+        os.utime(module_file, ns=(0, 2_000_000_000))
+        reloaded = load_module(module_file)
+        assert reloaded is not module
+        assert reloaded.VALUE == 2
+
+    def test_load_module_size_change_with_same_mtime(self, tmp_path: Path):
+        module_file = tmp_path / 'sized_module.py'
+        module_file.write_text('VALUE = 1')
+        os.utime(module_file, ns=(0, 1_000_000_000))
+        assert load_module(module_file).VALUE == 1
+
+        module_file.write_text('VALUE = 10')
+        os.utime(module_file, ns=(0, 1_000_000_000))
+        assert load_module(module_file).VALUE == 10
+
+    def test_load_module_recently_modified_not_cached(self, tmp_path: Path):
+        module_file = tmp_path / 'racy_module.py'
+        module_file.write_text('VALUE = 1')
+        module = load_module(module_file)
+        assert load_module(module_file) is not module
+
+    def test_positional_args_count(self):
+        assert positional_args_count(build_func_no_arg, equals=0)
+        assert positional_args_count(build_func, equals=1)
+        assert not positional_args_count(build_func, equals=2)
+        assert not positional_args_count(build_func_2_args, equals=1)
+        assert positional_args_count(build_func_with_default, equals=1)
+        assert positional_args_count(Site('https://example.org/').generate, equals=1)
+        assert not positional_args_count(Site('https://example.org/').generate, equals=2)
+        assert positional_args_count(print, equals=1)
+
+    def test_positional_args_count_releases_functions(self):
+        def func(url):
+            pass
+
+        assert positional_args_count(func, equals=1)
+        ref = weakref.ref(func)
+        del func
+        assert ref() is None
+
+    def test_project_template_content_ignores_unknown_files(self, tmp_path: Path):
+        for file in ['index.html', 'website.py.j2', '.DS_Store', 'notes.txt', '_templates_/base.html',
+                     '_templates_/notes.txt', 'styles/global.scss', 'styles/readme.md', 'styles/.hidden.css',
+                     'img/logo.png', '.git/config']:
+            (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / file).touch()
+        with directory(tmp_path):
+            locations = {location for location, _ in project_template_content('title')}
+        assert locations == {'index.html', 'website.py', os.path.join('_templates_', 'base.html'),
+                             os.path.join('styles', 'global.scss'), 'img'}
+
+    def test_slugify_title(self):
+        assert slugify_title('My Project') == 'my_project'
+        assert slugify_title('2020 Blog') == 'blog'
+
+    def test_color(self):
+        color = Color(186, 43, 235)
+        assert color.css() == 'rgb(186, 43, 235)'
+        assert color.css(0.2) == 'rgba(186, 43, 235, 0.2)'
+        assert color == Color(186, 43, 235)
+        assert repr(color) == 'Color(r=186, g=43, b=235)'
+
+    def test_sys_path_starting(self, tmp_path: Path):
+        original = list(sys.path)
+        with pytest.raises(RuntimeError), sys_path_starting(tmp_path):
+            assert sys.path[0] == str(tmp_path)
+            raise RuntimeError()
+        assert sys.path == original
+
+        with sys_path_starting(Path(sys.path[-1])):
+            assert sys.path == original
+
 
 def assert_help_in_out(capsys):
     captured = capsys.readouterr()
@@ -286,6 +452,12 @@ def build_jinja_file(url):
     return site
 
 
+def build_exiting(url):
+    if Path('exit').exists():
+        os._exit(1)
+    return build_jinja_file(url)
+
+
 def build_func_no_arg():
     return Site(url='http://test-cli.py/')
 
@@ -298,6 +470,19 @@ def build_func_with_default(a, b='test'):
     return Site(url='http://test-cli.py/')
 
 
+class UnpicklableError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.callback = lambda: None
+
+    def __reduce__(self):
+        raise TypeError('cannot pickle')
+
+
+def build_unpicklable_failure(url):
+    raise UnpicklableError('failed')
+
+
 class MockStartServer:
     def __init__(self):
         self.run_count = 0
@@ -1,7 +1,9 @@
+import os
+from glob import glob
 from pathlib import Path
 
 from lightweight import paths
-from lightweight.files import directory
+from lightweight.files import directory, ipaths
 
 
 def test_dir():
@@ -29,4 +31,33 @@ def test_path():
 
 def test_directory():
     with directory('site'), open('file') as f:
-        assert 'A test file.' == f.read()
\ No newline at end of file
+        assert 'A test file.' == f.read()
+
+
+def test_hidden_files(tmp_path):
+    (tmp_path / '.hidden.md').touch()
+    (tmp_path / 'visible.md').touch()
+    assert set(paths(f'{tmp_path}/**/*.md')) == {tmp_path / 'visible.md'}
+    assert set(paths(f'{tmp_path}/.*.md')) == {tmp_path / '.hidden.md'}
+
+
+def test_cached_listing_refreshed_on_change(tmp_path):
+    (tmp_path / 'a.md').touch()
+    os.utime(tmp_path, ns=(0, 1_000_000_000))
+    assert set(paths(f'{tmp_path}/*.md')) == {tmp_path / 'a.md'}
+    (tmp_path / 'b.md').touch()
+    os.utime(tmp_path, ns=(0, 2_000_000_000))
+    assert set(paths(f'{tmp_path}/*.md')) == {tmp_path / 'a.md', tmp_path / 'b.md'}
+
+
+def test_recursive_directories_match_glob():
+    with directory('resources'):
+        assert set(paths('**/')) == {Path(p) for p in glob('**/', recursive=True)}
+        assert Path('.') not in set(paths('**/'))
+    assert set(paths('resources/**/')) == {Path(p) for p in glob('resources/**/', recursive=True)}
+
+
+def test_ipaths():
+    found = ipaths('resources/glob/*.html')
+    assert next(found) in {Path('resources/glob/a.html'), Path('resources/glob/b.html')}
+    assert len(list(found)) == 1
@@ -75,3 +75,13 @@ def test_slash(tmp_path: Path):
     bad_behaviour = 0
     with pytest.raises(ValueError):
         parent / bad_behaviour
+
+
+def test_create(tmp_path: Path):
+    path = GenPath(Path('nested/file.txt'), tmp_path, lambda location: location)
+
+    path.create('Хай, світе!')
+    assert path.real_path.read_text(encoding='utf-8') == 'Хай, світе!'
+
+    path.create(b'bytes')
+    assert path.real_path.read_bytes() == b'bytes'
@@ -4,6 +4,7 @@ from uuid import uuid4
 import pytest
 
 from lightweight import Site
+from lightweight.content.copies import DirectoryCopy
 
 
 def test_include_file(tmp_path: Path):
@@ -45,6 +46,14 @@ def test_include_directory(tmp_path: Path):
     assert (test_out / src_location).read_text() == src_content
 
 
+def test_include_directory_as_single_task(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('resources/test_nested')
+    tasks = [task for ic in site.content for task in ic.make_tasks(site.create_ctx(tmp_path))]
+    assert len(tasks) == 1
+    assert isinstance(tasks[0].content, DirectoryCopy)
+
+
 def test_include_glob(tmp_path: Path):
     test_out = tmp_path / 'out'
     site = Site(url='https://example.org/')
@@ -1,8 +1,15 @@
+import gc
+import os
+import shutil
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 
-from lightweight import Site
+import lightweight.site
+from lightweight import Site, directory, jinja, Content, GenPath, GenContext
 from lightweight.errors import AbsolutePathIncluded, IncludedDuplicate
 
 
@@ -22,6 +29,172 @@ def assert_site_render(src_location, content, tmp_path):
     assert (test_out / src_location).read_text() == src_content
 
 
+def test_generate_from_multiple_cwds(tmp_path: Path):
+    test_out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('resources/test.html')
+    with directory('site'):
+        site.add('file')
+        site.add('page.html', jinja('page.html'))
+    site.generate(test_out)
+    assert (test_out / 'resources/test.html').read_text() == Path('resources/test.html').read_text()
+    assert (test_out / 'file').read_text() == Path('site/file').read_text()
+    assert (test_out / 'page.html').exists()
+
+
+def test_regenerate_in_place(tmp_path: Path):
+    source = tmp_path / 'source.txt'
+    source.write_text('copied')
+    test_out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('copy.txt', str(source))
+    site.generate(test_out)
+
+    copied, stale = test_out / 'copy.txt', test_out / 'stale' / 'file.txt'
+    assert copied.stat().st_mtime_ns == source.stat().st_mtime_ns
+    copied.write_text('COPIED')  # same size, marks whether the file is rewritten
+    os.utime(copied, ns=(0, source.stat().st_mtime_ns))
+    stale.parent.mkdir()
+    stale.write_text('stale')
+    site.generate(test_out)
+
+    assert copied.read_text() == 'COPIED'  # up to date, not rewritten
+    assert not stale.parent.exists()
+
+    source.write_text('change')  # same size, older modification time
+    os.utime(source, ns=(0, 1_000_000_000))
+    site.generate(test_out)
+    assert copied.read_text() == 'change'
+
+
+def test_regenerate_directory_copy(tmp_path: Path):
+    source = tmp_path / 'source'
+    (source / 'nested').mkdir(parents=True)
+    (source / 'nested' / 'a.txt').write_text('a')
+    (source / 'b.txt').write_text('b')
+    test_out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('copy', str(source))
+    site.generate(test_out)
+
+    (source / 'b.txt').unlink()
+    (source / 'nested' / 'a.txt').unlink()
+    (source / 'nested' / 'c.txt').write_text('c')
+    site.generate(test_out)
+
+    assert {str(p.relative_to(test_out)) for p in test_out.rglob('*')} == {'copy', 'copy/nested',
+                                                                           'copy/nested/c.txt'}
+
+
+def test_regenerate_directory_as_file(tmp_path: Path):
+    test_out = tmp_path / 'out'
+    directory_site = Site(url='https://example.org/')
+    directory_site.add('page', 'resources/test_nested')
+    directory_site.generate(test_out)
+
+    file_site = Site(url='https://example.org/')
+    file_site.add('page', 'resources/test.html')
+    file_site.generate(test_out)
+    assert (test_out / 'page').read_text() == Path('resources/test.html').read_text()
+
+    jinja_site = Site(url='https://example.org/')
+    jinja_site.add('page/index.html', jinja('resources/test.html'))
+    jinja_site.generate(test_out)
+    assert (test_out / 'page' / 'index.html').exists()
+
+    directory_site.generate(test_out)
+    jinja_site = Site(url='https://example.org/')
+    jinja_site.add('page', jinja('resources/test.html'))
+    jinja_site.generate(test_out)
+    assert (test_out / 'page').is_file()
+
+
+def test_regenerate_keeps_targets_outside_out(tmp_path: Path):
+    test_out = tmp_path / 'out'
+    outside = tmp_path / 'outside'
+    (outside / 'nested').mkdir(parents=True)
+    site = Site(url='https://example.org/')
+    site.add('../outside', jinja('resources/test.html'))
+    with pytest.raises(IsADirectoryError):
+        site.generate(test_out)
+    assert (outside / 'nested').is_dir()
+
+
+def test_regenerate_keeps_content_preserving_mtime(tmp_path: Path):
+    class PreservingCopy(Content):
+        def write(self, path: GenPath, ctx: GenContext):
+            path.parent.mkdir()
+            shutil.copy2('resources/test.html', path.absolute())
+
+    test_out = tmp_path / 'out'
+    site = Site(url='https://example.org/')
+    site.add('keep.html', PreservingCopy())
+    site.generate(test_out)
+    site.generate(test_out)
+    assert (test_out / 'keep.html').exists()
+
+
+def test_generate_concurrently_from_threads(tmp_path: Path):
+    barrier = threading.Barrier(2, timeout=10)
+
+    class Rendezvous(Content):
+        def write(self, path: GenPath, ctx: GenContext):
+            barrier.wait()  # both generations are running at the same time
+            path.create('done')
+
+    sites = [Site(url='https://example.org/') for _ in range(2)]
+    for site in sites:
+        site.add('page.html', Rendezvous())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for future in [pool.submit(site.generate, tmp_path / f'out{i}') for i, site in enumerate(sites)]:
+            future.result()
+    assert (tmp_path / 'out0' / 'page.html').read_text() == 'done'
+    assert (tmp_path / 'out1' / 'page.html').read_text() == 'done'
+
+
+def test_thread_loops_closed(tmp_path: Path, monkeypatch):
+    loops = []
+
+    def recording_loop():
+        loops.append(generation_loop())
+        return loops[-1]
+
+    generation_loop = lightweight.site._generation_loop
+    monkeypatch.setattr(lightweight.site, '_generation_loop', recording_loop)
+    site = Site(url='https://example.org/')
+    site.add('page.html', jinja('resources/test.html'))
+    for i in range(3):
+        thread = threading.Thread(target=site.generate, args=(tmp_path / f'out{i}',))
+        thread.start()
+        thread.join()
+    assert len(loops) == 3
+    assert all(loop.is_closed() for loop in loops)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_generate_after_forked_child_generated(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    site.add('resources/test.html')
+    site.generate(tmp_path / 'parent')
+    pid = os.fork()
+    if pid == 0:
+        site.generate(tmp_path / 'child')
+        gc.collect()  # must not close the loop inherited from the parent
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    def timeout(*_):
+        raise TimeoutError('generation loop does not wake up')
+
+    previous = signal.signal(signal.SIGALRM, timeout)
+    signal.alarm(5)
+    try:
+        site.generate(tmp_path / 'parent')
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
 def test_absolute_includes_not_allowed():
     site = Site('https://example.org/')
     with pytest.raises(AbsolutePathIncluded):
@@ -33,6 +206,24 @@ def test_site_location(tmp_path: Path):
     assert site / 'test.html' == 'https://example.org/test.html'
     assert site / '/test.html' == 'https://example.org/test.html'
     assert site / '/foo/bar' == 'https://example.org/foo/bar'
+    assert site / '' == 'https://example.org/'
+
+
+def test_subsite_location():
+    site = Site(url='https://example.org/blog/')
+    assert site.host == 'example.org'
+    assert site.path_prefix == '/blog/'
+    assert site / 'posts/first' == 'https://example.org/blog/posts/first'
+    assert site / '/posts/first' == 'https://example.org/blog/posts/first'
+
+
+def test_bulk_include(tmp_path: Path):
+    site = Site(url='https://example.org/')
+    with directory('site'):
+        site._bulk_include([('page.html', jinja('page.html')), ('index.html', jinja('index.html'))])
+    assert [ic.cwd for ic in site.content] == [str(Path('site').absolute())] * 2
+    with pytest.raises(AbsolutePathIncluded):
+        site._bulk_include([('/page.html', jinja('resources/test.html'))])
 
 
 def test_site_include_duplicate():
@@ -55,5 +246,10 @@ def test_repr():
 def test_url_check():
     with pytest.raises(ValueError):
         Site(url='lightweight.site/')
+    with pytest.raises(ValueError):
+        Site(url='lightweight.site/?next=https://example.org/')
+    with pytest.raises(ValueError):
+        Site(url='localhost:8080/')
+    assert Site(url='file:///srv/out/').url == 'file:///srv/out/'
     with pytest.raises(ValueError):
         Site(url='https://lightweight.site')